@@ -40,12 +40,13 @@ extensions = [
 # Libraries to be mocked in the build process of the documentation.
 autodoc_mock_imports = [
     "pywin32",
-    "fuzzywuzzy",
+    "rapidfuzz",
     "pandas",
     "python-docx",
     "numpy",
     "win32com",
     "docx",
+    "lxml",
     "unidecode",
 ]
 
@@ -1,21 +1,21 @@
 import functools
+import hashlib
+import itertools
+import math
 import os
-import xml.etree.ElementTree
 import zipfile
-from collections import defaultdict, deque
+from collections import defaultdict
 from collections.abc import MutableSequence, Sequence
 from pathlib import Path
 from typing import MutableSequence, Sequence
-from xml.etree.ElementTree import Element
 
-import numpy as np
 import pandas as pd
-import win32com.client as win32
 from docx.api import Document
-from docx.table import Table
+from docx.table import Table, _Cell
+from lxml import etree
 
 from ..matcher import FieldOrientation
-from ..util import table_to_dataframe
+from ..util import records_to_dataframe
 
 _MAX_NESTING_LEVEL = 10
 
@@ -35,14 +35,13 @@ class DocxHandler:
             temp_folder (Path, optional): Path to temporary folder where docx files will
                 be created when the supplied file has .doc extension. Defaults to 'temp'.
         """
-        self._file_path = file_path
+        # resolved only once, as every call to resolve() queries the file system
+        self._file_path = file_path.resolve()
 
-        str_file_path = str(file_path.resolve())
-        if Path(file_path).suffix[1:] == "doc":
-            last_modified = int(Path(file_path).stat().st_mtime)
+        if self._file_path.suffix[1:] == "doc":
+            str_file_path = str(self._file_path)
             destination_path = _path_to_docx_file(
                 doc_file_path=str_file_path,
-                timestamp=last_modified,
                 folder=str(temp_folder.resolve()),
             )
             _doc_to_docx(
@@ -53,7 +52,7 @@ class DocxHandler:
 
     @property
     def docx_file_path(self) -> str:
-        return str(self._file_path.resolve())
+        return str(self._file_path)
 
     def get_mapping(self, orientation: FieldOrientation) -> dict[str, Sequence[str]]:
         """Retrieves the mapping of values in the document.
@@ -70,36 +69,17 @@ class DocxHandler:
     @functools.cached_property
     def _mapping(self) -> dict[FieldOrientation, dict[str, Sequence[str]]]:
         row_mapping: dict[str, MutableSequence[str]] = defaultdict(list)
-        for table in self._docx_tables:
-            n_cols = len(table.columns)
-
-            for row in table.rows:
-                cells = row.cells
-                values = [cell.text for cell in cells]
-                for k in range(n_cols - 1):
-                    if (k + 1) >= len(values):
-                        continue
-
-                    title = values[k]
-                    content = values[k + 1]
+        col_mapping: dict[str, MutableSequence[str]] = defaultdict(list)
+        for records in self._tables_records:
+            for values in records:
+                for title, content in zip(values, values[1:]):
                     if title == content or title == "" or content == "":
                         continue
 
                     row_mapping[title].append(content)
 
-        col_mapping: dict[str, MutableSequence[str]] = defaultdict(list)
-        for table in self._docx_tables:
-            n_rows = len(table.rows)
-
-            for col in table.columns:
-                cells = col.cells
-                values = [cell.text for cell in cells]
-                for k in range(n_rows - 1):
-                    if (k + 1) >= len(values):
-                        continue
-
-                    title = values[k]
-                    content = values[k + 1]
+            for values in zip(*records):
+                for title, content in zip(values, values[1:]):
                     if title == content or title == "" or content == "":
                         continue
 
@@ -117,15 +97,15 @@ class DocxHandler:
         Returns:
             Sequence[pd.DataFrame]: Sequence of tables in the document.
         """
-        tables = self._docx_tables
+        tables = self._tables_records
 
         # Getting subset of tables that has a merged header
         splited_tables = []
         aux_table = []
         for _, table in enumerate(tables):
-            for row in table.rows:
-                values = [x.text for x in row.cells]
-                if len(set(values)) == 1:
+            for values in table:
+                # stops at the first different cell, which is quick for data rows
+                if values and all(v == values[0] for v in values):
                     if len(values[0]) < 200:
                         # this is a merged table header with limited text lenght
                         splited_tables.append(aux_table)
@@ -137,7 +117,7 @@ class DocxHandler:
 
         # Gettind data from conventional tables
         for table in tables:
-            df = table_to_dataframe(table)
+            df = records_to_dataframe(table)
 
             if len(df) > 0:
                 dfs.append(df)
@@ -151,14 +131,8 @@ class DocxHandler:
             data = table[1:]
             header_size = len(header)
 
-            aux = []
-
             # Removing data with different length from header
-            for line in data:
-                if len(line) == header_size:
-                    aux.append(line)
-                else:
-                    break
+            aux = list(itertools.takewhile(lambda line: len(line) == header_size, data))
 
             df = pd.DataFrame(columns=header, data=aux)
             dfs.append(df)
@@ -166,29 +140,36 @@ class DocxHandler:
         return _merge_tables(dfs)
 
     @functools.cached_property
-    def _docx_tables(self) -> Sequence[Table]:
-        """List of tables in docx document"""
-        tables: MutableSequence[Table] = self._document.tables
+    def _tables_records(self) -> Sequence[Sequence[Sequence[str]]]:
+        """Text of the cells in each row of the docx tables.
 
-        new_tables = tables[:]
-        count = 0
-
-        # getting all inner tables
-        while new_tables:
-            aux = []
-            for table in new_tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        aux.extend(cell.tables)
+        Getting the text of a cell walks its whole XML content, so it is done only once
+        for all tables and shared by the mapping and the tables extraction.
+        """
+        return [
+            [[cell.text for cell in cells] for cells in _cells_grid(table)]
+            for table in self._docx_tables
+        ]
 
-            tables.extend(aux)
-            new_tables = aux
+    @functools.cached_property
+    def _docx_tables(self) -> Sequence[Table]:
+        """List of tables in docx document
 
-            count += 1
-            if count > _MAX_NESTING_LEVEL:
+        The tables are found one nesting level at a time with XPath queries, so the
+        outer tables come first. Only tables in the body or directly inside a cell are
+        taken, as tables in text boxes or content controls were never extracted.
+        """
+        body = self._document.element.body
+        tbls = body.xpath("./w:tbl")
+        level = tbls
+        for _ in range(_MAX_NESTING_LEVEL + 1):
+            level = [inner for tbl in level for inner in tbl.xpath("./w:tr/w:tc/w:tbl")]
+            if not level:
                 break
 
-        return tables
+            tbls.extend(level)
+
+        return [Table(tbl, self._document) for tbl in tbls]
 
     @functools.cached_property
     def _document(self) -> Document:
@@ -197,16 +178,23 @@ class DocxHandler:
         Returns:
             Document: Word document object.
         """
-        return Document(str(self._file_path.resolve()))
+        return Document(self.docx_file_path)
 
 
 _WORD_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
 _TEXT = _WORD_NAMESPACE + "t"
 _TABLE = _WORD_NAMESPACE + "tbl"
-_ROW = _WORD_NAMESPACE + "tr"
-_CELL = _WORD_NAMESPACE + "tc"
 _PARAGRAPH = _WORD_NAMESPACE + "p"
 
+# compiled once instead of parsing the path expression for every element
+_NAMESPACES = {"w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"}
+_ROWS = etree.XPath("./w:tr", namespaces=_NAMESPACES)
+_CELLS = etree.XPath("./w:tc", namespaces=_NAMESPACES)
+
+# documents come from outside, so their XML must not pull in external entities or
+# reach the network while parsed
+_XML_PARSER = etree.XMLParser(resolve_entities=False, no_network=True)
+
 
 class DocxXMLHandler:
     def __init__(
@@ -225,10 +213,8 @@ class DocxXMLHandler:
         self._file_path = file_path
 
         if Path(file_path).suffix[1:] == "doc":
-            last_modified = int(Path(file_path).stat().st_mtime)
             destination_path = _path_to_docx_file(
                 doc_file_path=file_path,
-                timestamp=last_modified,
                 folder=temp_folder,
             )
             _doc_to_docx(
@@ -243,42 +229,57 @@ class DocxXMLHandler:
 
     @functools.cache
     def get_tables(self) -> Sequence[pd.DataFrame]:
-        with zipfile.ZipFile(self._file_path) as docx:
-            tree = xml.etree.ElementTree.XML(docx.read("word/document.xml"))
-
         tables: MutableSequence[pd.DataFrame] = []
-        for table in tree.iter(_TABLE):
-            data: MutableSequence[MutableSequence[str]] = []
-            for row in table.findall(f"./{_ROW}"):
-                data.append(
-                    [_get_combined_text(cell) for cell in row.findall(f"./{_CELL}")]
-                )
-
-            df = pd.DataFrame(data)
-            df.columns = df.iloc[0].to_numpy(dtype=str)
-            df = df[1:]
+        for data in self._tables_records:
+            # merged cells make rows shorter than the table, so all rows are padded with
+            # missing values, which name the extra columns "nan" in short headers
+            n_cols = max(len(values) for values in data)
+            header, *rows = [
+                [*values, *[math.nan] * (n_cols - len(values))] for values in data
+            ]
 
-            tables.append(df)
+            tables.append(pd.DataFrame(rows, columns=[str(h) for h in header]))
 
         return _merge_tables(tables)
 
+    @functools.cached_property
+    def _tables_records(self) -> Sequence[Sequence[Sequence[str]]]:
+        """Text of the cells in each row of the document tables.
+
+        The document XML is read and parsed only once per handler.
+        """
+        with zipfile.ZipFile(self._file_path) as docx:
+            content = docx.read("word/document.xml")
+
+        # documents without tables are not parsed at all; the search ignores the
+        # namespace prefix, which is not fixed by the format
+        if b"tbl" not in content:
+            return []
+
+        tree = etree.fromstring(content, _XML_PARSER)
+        return [
+            [[_get_combined_text(cell) for cell in _CELLS(row)] for row in _ROWS(table)]
+            for table in tree.iter(_TABLE)
+        ]
+
     @functools.cached_property
     def _mapping(self) -> dict[FieldOrientation, dict[str, Sequence[str]]]:
-        mapping: dict[FieldOrientation, dict[str, MutableSequence[str]]] = {
-            FieldOrientation.ROW: defaultdict(list),
-            FieldOrientation.COLUMN: defaultdict(list),
-        }
+        row_mapping: dict[str, MutableSequence[str]] = defaultdict(list)
+        col_mapping: dict[str, MutableSequence[str]] = defaultdict(list)
         for df in self.get_tables():
             records = _table_to_records(df)
             for row in records:
-                for i, key in enumerate(row[:-1]):
-                    mapping[FieldOrientation.ROW][key].append(row[i + 1])
+                for key, value in zip(row, row[1:]):
+                    row_mapping[key].append(value)
 
-            for col in np.array(records).T.tolist():
-                for i, key in enumerate(col[:-1]):
-                    mapping[FieldOrientation.COLUMN][key].append(col[i + 1])
+            for col in zip(*records):
+                for key, value in zip(col, col[1:]):
+                    col_mapping[key].append(value)
 
-        return mapping
+        return {
+            FieldOrientation.ROW: row_mapping,
+            FieldOrientation.COLUMN: col_mapping,
+        }
 
     def get_mapping(self, orientation: FieldOrientation) -> dict[str, Sequence[str]]:
         """Retrieves the mapping of values in the document.
@@ -293,16 +294,31 @@ class DocxXMLHandler:
         return self._mapping[orientation]
 
 
+def _cells_grid(table: Table) -> Sequence[Sequence[_Cell]]:
+    """Gets the cells of a table as a grid of rows.
+
+    Every access to `row.cells` or `column.cells` in python-docx builds the cells of the
+    whole table again, so the cells are built only once and split into rows here.
+    """
+    cells = table._cells
+    n_cols = len(table.columns)
+    if n_cols == 0:
+        return []
+
+    return [cells[i : i + n_cols] for i in range(0, len(cells), n_cols)]
+
+
 def _table_to_records(df: pd.DataFrame) -> Sequence[Sequence[str]]:
     return [df.columns.to_numpy(dtype=str).tolist()] + df.to_numpy(dtype=str).tolist()
 
 
-def _get_combined_text(cell: Element) -> str:
+def _get_combined_text(cell: etree._Element) -> str:
     # TODO handle merged cells
     fragments: MutableSequence[str] = []
-    q = deque(cell.findall("./*"))
-    while q:
-        cell = q.popleft()
+    # depth-first stack holding the next element at its end
+    stack = list(reversed(cell))
+    while stack:
+        cell = stack.pop()
         if cell.tag == _TABLE:
             continue
 
@@ -313,34 +329,35 @@ def _get_combined_text(cell: Element) -> str:
             if frag := str(cell.text):
                 fragments.append(frag)
 
-        q.extendleft(cell.findall("./*")[::-1])
+        stack.extend(reversed(cell))
 
     return "".join(fragments)
 
 
-def _path_to_docx_file(doc_file_path: str, timestamp: int, folder: str) -> str:
-    """Creates a standard name for temporary .docx files."""
+def _path_to_docx_file(doc_file_path: str, folder: str) -> str:
+    """Creates a standard name for temporary .docx files.
+
+    The name includes a hash of the .doc file content, so a file is converted again only
+    when its content changes, not when it is just touched or copied.
+    """
     folder_path = Path(folder)
     folder_path.mkdir(parents=True, exist_ok=True)
 
+    digest = hashlib.blake2b(Path(doc_file_path).read_bytes(), digest_size=8)
     original_file_name = Path(doc_file_path).stem
-    destination_path = folder_path / f"x_{original_file_name}_{timestamp}.docx"
+    destination_path = folder_path / f"x_{original_file_name}_{digest.hexdigest()}.docx"
 
     return str(destination_path.resolve())
 
 
 def _merge_tables(tables: Sequence[pd.DataFrame]) -> Sequence[pd.DataFrame]:
-    groups: dict[str, MutableSequence[pd.DataFrame]] = defaultdict(list)
+    groups: dict[tuple[str, ...], MutableSequence[pd.DataFrame]] = defaultdict(list)
     for df in tables:
-        cols = df.columns.to_numpy(dtype=str).tolist()
-        cols.sort()
-        groups["".join(cols)].append(df)
+        groups[tuple(sorted(df.columns.to_numpy(dtype=str).tolist()))].append(df)
 
     merged_tables: Sequence[pd.DataFrame] = []
     for dfs in groups.values():
-        merged = pd.concat(dfs)
-        merged.drop_duplicates(inplace=True)
-        merged.reset_index(drop=True, inplace=True)
+        merged = pd.concat(dfs, ignore_index=True).drop_duplicates(ignore_index=True)
         merged_tables.append(merged)
 
     return merged_tables
@@ -358,6 +375,9 @@ def _doc_to_docx(doc_file_path: str, docx_file_path: str) -> None:
     if os.path.exists(docx_file_path):
         return
 
+    # imported here so that only the conversion of .doc files depends on Word
+    import win32com.client as win32
+
     word = win32.gencache.EnsureDispatch("Word.Application")
 
     doc = word.Documents.Open(doc_file_path)
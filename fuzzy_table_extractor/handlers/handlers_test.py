@@ -3,6 +3,8 @@ from typing import Protocol, Sequence
 
 import pandas as pd
 import pytest
+from docx import Document
+from docx.oxml import OxmlElement
 
 from ..matcher import FieldOrientation
 from .docx_handler import DocxHandler, DocxXMLHandler
@@ -53,6 +55,58 @@ def test_docx_handler_assert_mapping_values(handler: Handler):
     ]
 
 
+def test_docx_xml_handler_merged_cells(tmp_path: Path):
+    # merging the last 2 cells of the data rows makes them shorter than the header
+    document = Document()
+    table = document.add_table(rows=3, cols=3)
+    for cell, text in zip(table.rows[0].cells, ["ID", "Name", "Age"]):
+        cell.text = text
+
+    for i, name in enumerate(["Paul", "John"], start=1):
+        table.cell(i, 0).text = str(i - 1)
+        table.cell(i, 1).merge(table.cell(i, 2)).text = name
+
+    file_path = tmp_path / "merged cells.docx"
+    document.save(str(file_path))
+
+    handler = DocxXMLHandler(str(file_path))
+    tables = handler.get_tables()
+    assert len(tables) == 1
+    assert tables[0].columns.to_list() == ["ID", "Name", "Age"]
+    assert tables[0]["Name"].to_list() == ["Paul", "John"]
+    assert tables[0]["Age"].isna().all()
+    assert handler.get_mapping(orientation=FieldOrientation.COLUMN)["Name"] == ["Paul"]
+
+
+def test_docx_handler_ignores_content_control_tables(tmp_path: Path):
+    # tables in content controls were never extracted, unlike tables inside cells
+    document = Document()
+    table = document.add_table(rows=2, cols=2)
+    for cell, text in zip(table._cells, ["ID", "Name", "0", "Paul"]):
+        cell.text = text
+
+    inner_table = table.cell(1, 1).add_table(rows=2, cols=1)
+    for cell, text in zip(inner_table._cells, ["Age", "25"]):
+        cell.text = text
+
+    control_table = document.add_table(rows=2, cols=1)
+    for cell, text in zip(control_table._cells, ["Control", "CCVal"]):
+        cell.text = text
+
+    sdt, sdt_content = OxmlElement("w:sdt"), OxmlElement("w:sdtContent")
+    control_table._tbl.addprevious(sdt)
+    sdt.append(sdt_content)
+    sdt_content.append(control_table._tbl)
+
+    file_path = tmp_path / "content control.docx"
+    document.save(str(file_path))
+
+    handler = DocxHandler(file_path)
+    tables = handler.get_tables()
+    assert [t.columns.to_list() for t in tables] == [["ID", "Name"], ["Age"]]
+    assert "Control" not in handler.get_mapping(orientation=FieldOrientation.COLUMN)
+
+
 _DOC_FILE_PATH = r"src\fte\sample_docs\E001 - basic content.doc"
 
 
@@ -1,3 +1,4 @@
+import functools
 import re
 from collections.abc import MutableSequence, Sequence
 from dataclasses import dataclass
@@ -8,7 +9,9 @@ import numpy as np
 import pandas as pd
 from scipy import optimize
 
-from .util import str_comparison
+from .util import str_comparison_matrix
+
+_MAX_RATIO = 100
 
 
 class NoValidMatchError(Exception):
@@ -40,6 +43,9 @@ class Matcher:
     def __init__(self, handler: Handler) -> None:
         self._handler = handler
 
+        # proximity ratios by (table headers, search headers), reused across searches
+        self._ratios: dict[tuple[tuple[str, ...], tuple[str, ...]], int] = {}
+
     def match_table(
         self,
         search_headers: MutableSequence[str],
@@ -68,21 +74,27 @@ class Matcher:
                 - Table with best match for search_headers;
                 - Score of the match.
         """
-        tables = self._handler.get_tables()
-        if validation_funtion is not None:
-            tables = [t for t in tables if validation_funtion(t.columns.to_list())]
-
-        if not tables:
+        df: Optional[pd.DataFrame] = None
+        best_ratio = -1
+        for t in self._handler.get_tables():
+            # headers are materialized once and shared by validation and scoring
+            columns = t.columns.to_list()
+            if validation_funtion is not None and not validation_funtion(columns):
+                continue
+
+            # only a higher ratio replaces the best table, so the tables that are sure
+            # to stay below it are not fully scored
+            ratio = self._headers_ratio(columns, search_headers, best_ratio + 1)
+            if ratio > best_ratio:
+                df, best_ratio = t, ratio
+
+            # the first table with the highest possible ratio is always the best match
+            if best_ratio == _MAX_RATIO:
+                break
+
+        if df is None:
             raise NoValidMatchError
 
-        ratios: MutableSequence[int] = []
-        for t in tables:
-            headers = [str(h) for h in t.columns.to_list()]
-            ratios.append(
-                sequence_proximity_ratio(ref_seq=headers, test_seq=search_headers)
-            )
-
-        df = tables[np.argmax(ratios)]
         if rename_columns:
             df = get_columns_fuzzy(
                 df=df,
@@ -90,7 +102,24 @@ class Matcher:
                 allow_duplicated_columns=allow_duplicated_columns,
             )
 
-        return df, max(ratios)
+        return df, best_ratio
+
+    def _headers_ratio(
+        self, columns: Sequence[Any], search_headers: Sequence[str], min_ratio: int
+    ) -> int:
+        key = (tuple(str(h) for h in columns), tuple(search_headers))
+        if key in self._ratios:
+            return self._ratios[key]
+
+        ratio = sequence_proximity_ratio(
+            ref_seq=key[0], test_seq=key[1], min_ratio=min_ratio
+        )
+
+        # ratios below the minimum may be a shortcut, not the real ratio
+        if ratio >= min_ratio:
+            self._ratios[key] = ratio
+
+        return ratio
 
     def match_field(
         self,
@@ -118,52 +147,80 @@ class Matcher:
             tuple[str, int]: The content with highest proximity ratio and the value of this ratio.
         """
 
-        map_ = self._handler.get_mapping(orientation=orientation)
+        title_match = _patterns_matcher(tuple(title_regex))
+        c_match = _patterns_matcher(tuple(regex))
+
+        # title and content filters are applied in a single pass over the mapping
+        map_: dict[str, Sequence[str]] = {}
+        for k, v in self._handler.get_mapping(orientation=orientation).items():
+            if title_match is not None and not title_match(k):
+                continue
+
+            if c_match is not None:
+                v = [i for i in v if c_match(i)]
 
-        if title_regex:
-            title_pattern = re.compile("|".join(title_regex))
-            map_ = {k: v for k, v in map_.items() if title_pattern.search(k)}
+            # keys without any content have nothing to return
+            if not v:
+                continue
 
-        if regex:
-            c_pattern = re.compile("|".join(regex))
-            map_ = {k: [i for i in v if c_pattern.search(i)] for k, v in map_.items()}
-            map_ = {k: v for k, v in map_.items() if v}
+            map_[k] = v
 
         if not map_:
             return "", 0
 
-        df = (
-            pd.DataFrame(data=map_.items(), columns=["key", "value"])
-            .explode(["value"])
-            .reset_index(drop=True)
-        )
+        # all contents of a key share its ratio, so only the keys need to be scored
+        keys = list(map_)
+        ratios = str_comparison_matrix([field], keys)[0]
+        max_ratio = int(ratios.max())
 
-        df["ratio"] = df["key"].apply(lambda x: str_comparison(x, field))
-        df.sort_values(by="ratio", inplace=True, ascending=False)
+        if return_multiple:
+            values = [
+                v for k, r in zip(keys, ratios) if r == max_ratio for v in map_[k]
+            ]
+            best_match = ", ".join(values)
+        else:
+            best_match = map_[keys[int(ratios.argmax())]][0]
 
-        max_ratio = df["ratio"].max()
+        return best_match, max_ratio
 
-        try:
-            if return_multiple:
-                values = df[df["ratio"] == max_ratio]["value"].to_list()
-                best_match = ", ".join(values)
-            else:
-                best_match = df["value"].values[0]
-        except IndexError:
-            return "", 0
 
-        return best_match, max_ratio
+@functools.lru_cache(maxsize=128)
+def _patterns_matcher(patterns: tuple[str, ...]) -> Optional[Callable[[str], bool]]:
+    """Creates a function that checks whether a text matches any of the regex patterns.
+
+    Patterns without special characters are checked with a substring search, avoiding
+    the regex engine for them. If there are no patterns, or one of them is empty (and
+    therefore matches any text), None is returned as there is nothing to filter. The
+    same patterns are usually searched repeatedly, so the functions are cached.
+    """
+    if not patterns or "" in patterns:
+        return None
+
+    literals = [p for p in patterns if re.escape(p) == p]
+    expressions = [p for p in patterns if re.escape(p) != p]
+
+    if not expressions:
+        return lambda text: any(lit in text for lit in literals)
+
+    pattern = re.compile("|".join(expressions))
+    return lambda text: any(lit in text for lit in literals) or bool(
+        pattern.search(text)
+    )
 
 
 def sequence_proximity_ratio(
-    ref_seq: Sequence[str], test_seq: Sequence[str], optimal_match: bool = True
+    ref_seq: Sequence[str],
+    test_seq: Sequence[str],
+    optimal_match: bool = True,
+    min_ratio: int = 0,
 ) -> int:
     """Calculates the proximity ratio for 2 sequences of strings.
 
     To calculate the proximity ratio, first the best association between terms in the test
     sequence and terms in the reference sequence is found. Each pair in this association
     has a proximity ratio between the terms, the proximity ratio of the sequence is the
-    smallest proximity ratio between terms.
+    smallest proximity ratio between terms. If the test sequence is longer than the
+    reference sequence, the proximity ratio is 0.
 
     Args:
         ref_seq (Sequence[str]): Reference sequence of strings.
@@ -172,17 +229,32 @@ def sequence_proximity_ratio(
             reference and test sequences. The optimal algorithm solves the linear sum
             assignment problem, which has O(n³) complexity, while the non optimal approach
             uses a naive algorithm with O(n²) complexity. Defaults to True.
+        min_ratio (int): Proximity ratio below which the exact value is not needed. When
+            the optimal association is sure to be below it, 0 is returned without
+            solving the assignment. Defaults to 0.
 
     Returns:
         int: Proximity ratio of the sequences.
     """
 
+    # not all terms in the test sequence can be associated
+    if len(test_seq) > len(ref_seq):
+        return 0
+
+    # identical terms have the highest ratio, so the optimal association is trivial
+    if optimal_match and _exact_match(ref_seq, test_seq):
+        return _MAX_RATIO
+
     # TODO benchmark 2 approaches
     if optimal_match:
-        matches = _optimal_sequence_matching(ref_seq, test_seq)
-    else:
-        matches = _naive_sequence_matching(ref_seq, test_seq)
+        # only the scores are needed, so the matches themselves are not built
+        association = _optimal_association(ref_seq, test_seq, min_score=min_ratio)
+        if association is None or association[2].size == 0:
+            return 0
+
+        return int(association[2].min())
 
+    matches = _naive_sequence_matching(ref_seq, test_seq)
     if len(matches) == 0:
         return 0
 
@@ -190,6 +262,22 @@ def sequence_proximity_ratio(
     return min(scores)
 
 
+def _exact_match(ref_seq: Sequence[Any], test_seq: Sequence[Any]) -> bool:
+    """Whether every term in the test sequence has an identical term in the reference.
+
+    The terms in the test sequence must be distinct strings, so that each of them can be
+    associated with a different term of the reference sequence. An empty test sequence
+    has no association, so it is not an exact match.
+    """
+    terms = set(test_seq)
+    return (
+        len(terms) > 0
+        and len(terms) == len(test_seq)
+        and all(isinstance(t, str) for t in terms)
+        and terms.issubset(ref_seq)
+    )
+
+
 def _naive_sequence_matching(
     ref_seq: Sequence[str], test_seq: Sequence[str]
 ) -> Sequence[_TableMatch]:
@@ -198,50 +286,72 @@ def _naive_sequence_matching(
     if len(test_seq) > len(ref_seq):
         return []
 
-    # creating a copy of the list to prevent modifying it inplace
-    ref_seq_ = list(ref_seq[:])
+    scores = str_comparison_matrix(test_seq, ref_seq)
+    available = np.ones(len(ref_seq), dtype=bool)
 
     matches: Sequence[_TableMatch] = []
-    for term in test_seq:
-        scores = [str_comparison(x, term) for x in ref_seq_]
-
-        max_index = np.argmax(scores)
-        max_score = np.max(scores)
+    for i, term in enumerate(test_seq):
+        # terms already associated are masked instead of removed, so the indexes in the
+        # scores matrix remain valid
+        max_index = int(np.argmax(np.where(available, scores[i], -1)))
+        available[max_index] = False
 
         entry = _TableMatch(
             search_term=term,
-            original_term=ref_seq_[max_index],
-            score=max_score,
+            original_term=ref_seq[max_index],
+            score=int(scores[i, max_index]),
         )
 
         matches.append(entry)
 
-        ref_seq_.pop(max_index)
-
     return matches
 
 
 def _optimal_sequence_matching(
-    ref_seq: Sequence[str], test_seq: Sequence[str]
+    ref_seq: Sequence[str], test_seq: Sequence[str], min_score: int = 0
 ) -> Sequence[_TableMatch]:
-    """Finds the optimal association between terms in 2 sequences."""
-    cost_matrix = [[str_comparison(r, t) for t in test_seq] for r in ref_seq]
+    """Finds the optimal association between terms in 2 sequences.
 
-    row_ind: Sequence[int]
-    col_ind: Sequence[int]
-    row_ind, col_ind = optimize.linear_sum_assignment(cost_matrix, maximize=True)
+    If any term in the test sequence has no term in the reference sequence with at least
+    `min_score`, no association can reach it and an empty sequence is returned.
+    """
+    association = _optimal_association(ref_seq, test_seq, min_score=min_score)
+    if association is None:
+        return []
+
+    row_ind, col_ind, scores = association
 
     matches: Sequence[_TableMatch] = []
-    for r, c in zip(row_ind, col_ind):
+    for r, c, score in zip(row_ind, col_ind, scores):
         matches.append(
             _TableMatch(
-                search_term=test_seq[c], original_term=ref_seq[r], score=cost_matrix[r][c]
+                search_term=test_seq[c],
+                original_term=ref_seq[r],
+                score=int(score),
             )
         )
 
     return matches
 
 
+def _optimal_association(
+    ref_seq: Sequence[str], test_seq: Sequence[str], min_score: int = 0
+) -> Optional[tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Solves the optimal association between terms in 2 sequences.
+
+    Returns:
+        Optional[tuple[np.ndarray, np.ndarray, np.ndarray]]: Indexes in the reference
+            sequence, indexes in the test sequence and scores of the associated pairs, or
+            None if no association can reach `min_score`.
+    """
+    cost_matrix = str_comparison_matrix(ref_seq, test_seq)
+    if cost_matrix.size and cost_matrix.max(axis=0).min() < min_score:
+        return None
+
+    row_ind, col_ind = optimize.linear_sum_assignment(cost_matrix, maximize=True)
+    return row_ind, col_ind, cost_matrix[row_ind, col_ind]
+
+
 def get_columns_fuzzy(
     df: pd.DataFrame,
     columns: MutableSequence[str],
@@ -270,21 +380,28 @@ def get_columns_fuzzy(
         pd.DataFrame: Dataframe with selected columns. Note that the columns in the
             dataframe will be renamed to match values inputed in the function.
     """
-    df_ = df.copy()
-
     if len(df.columns) < len(columns):
         raise NoValidMatchError
 
-    association = _optimal_sequence_matching(df_.columns.to_list(), columns)
-    min_ratio = min([m.score for m in association])
-    if min_ratio < threshold:
+    # columns found with the exact names are the best possible match, so no fuzzy
+    # association is needed to select them; the selection is copied, as it would
+    # otherwise stay linked to the handler's cached table
+    if _exact_match(df.columns.to_list(), columns) and not df.columns.has_duplicates:
+        return df[columns].copy()
+
+    association = _optimal_sequence_matching(
+        df.columns.to_list(), columns, min_score=threshold
+    )
+    if not association or min([m.score for m in association]) < threshold:
         raise NoValidMatchError
 
     original = [x.original_term for x in association]
-    df_ = df_[original]
+    df_ = df[original]
 
+    # selecting the columns already creates a new dataframe, so its labels can be
+    # replaced directly instead of renaming (and copying) it again
     rename_dict = {x.original_term: x.search_term for x in association}
-    df_.rename(columns=rename_dict, inplace=True)
+    df_.columns = [rename_dict[c] for c in df_.columns]
 
     if df_.columns.duplicated().any() and not allow_duplicated_columns:
         df_ = df_.loc[:, ~df_.columns.duplicated()]
@@ -1,8 +1,16 @@
+import warnings
 from collections.abc import Sequence
 
 import pandas as pd
+import pytest
 
-from .matcher import FieldOrientation, Matcher
+from .matcher import (
+    FieldOrientation,
+    Matcher,
+    NoValidMatchError,
+    get_columns_fuzzy,
+    sequence_proximity_ratio,
+)
 
 
 class FakeHandler:
@@ -73,6 +81,33 @@ def test_match_field_content_regex():
     assert field == "other_content"
 
 
+def test_match_field_literal_and_pattern_regex():
+    matcher = Matcher(
+        FakeHandler(
+            mapping={"title": ["content", "other (1)", "12/05/2022"]}, tables=[]
+        )
+    )
+
+    field, _ = matcher.match_field(
+        "title",
+        orientation=FieldOrientation.ROW,
+        return_multiple=True,
+        regex=["other", r"\d+/\d+/\d+"],
+    )
+    assert field == "other (1), 12/05/2022"
+
+
+def test_match_field_empty_contents():
+    matcher = Matcher(FakeHandler(mapping={"title": []}, tables=[]))
+    assert matcher.match_field("title", FieldOrientation.ROW) == ("", 0)
+
+    matcher = Matcher(FakeHandler(mapping={"title": [], "titl": ["x"]}, tables=[]))
+    assert matcher.match_field("title", FieldOrientation.ROW) == ("x", 100)
+
+    match = matcher.match_field("title", FieldOrientation.ROW, return_multiple=True)
+    assert match == ("x", 100)
+
+
 def test_match_table():
     matcher = Matcher(
         FakeHandler(
@@ -123,6 +158,55 @@ def test_match_table_more_headers():
     assert table.columns.to_list() == ["title", "name"]
 
 
+def test_match_table_repeated_searches():
+    matcher = Matcher(
+        FakeHandler(
+            mapping={},
+            tables=_create_fake_dataframes([["city", "state"], ["title", "name"]]),
+        )
+    )
+
+    for _ in range(2):
+        table, _ = matcher.match_table(search_headers=["title", "name"])
+        assert table.columns.to_list() == ["title", "name"]
+
+        table, _ = matcher.match_table(search_headers=["state", "city"])
+        assert table.columns.to_list() == ["state", "city"]
+
+
+def test_match_table_ratio_after_skipped_table():
+    matcher = Matcher(
+        FakeHandler(
+            mapping={},
+            tables=_create_fake_dataframes([["tilte", "naem"], ["tile", "nothing"]]),
+        )
+    )
+
+    table, ratio = matcher.match_table(search_headers=["title", "name"])
+    assert table.columns.to_list() == ["title", "name"]
+    assert ratio == 80
+
+    # the second table was not fully scored before, but its ratio must still be exact
+    _, ratio = matcher.match_table(
+        search_headers=["title", "name"],
+        validation_funtion=lambda headers: "nothing" in headers,
+    )
+    assert ratio == sequence_proximity_ratio(["tile", "nothing"], ["title", "name"])
+    assert ratio > 0
+
+
+def test_match_table_less_headers():
+    matcher = Matcher(
+        FakeHandler(
+            mapping={},
+            tables=_create_fake_dataframes([["title"], ["name", "other", "title"]]),
+        )
+    )
+
+    table, _ = matcher.match_table(search_headers=["title", "name"])
+    assert table.columns.to_list() == ["title", "name"]
+
+
 def test_match_table_duplicated_columns():
     matcher = Matcher(
         FakeHandler(
@@ -140,5 +224,35 @@ def test_match_table_duplicated_columns():
     assert table.columns.to_list() == ["title", "name"]
 
 
+def test_sequence_proximity_ratio_empty_test_sequence():
+    assert sequence_proximity_ratio(["a", "b"], []) == 0
+
+    matcher = Matcher(FakeHandler(mapping={}, tables=_create_fake_dataframes([["a"]])))
+    _, ratio = matcher.match_table(search_headers=[], rename_columns=False)
+    assert ratio == 0
+
+
+def test_get_columns_fuzzy_below_threshold():
+    df = pd.DataFrame(columns=["title", "nothing"])
+
+    with pytest.raises(NoValidMatchError):
+        get_columns_fuzzy(df, columns=["title", "name"], threshold=90)
+
+
+def test_get_columns_fuzzy_exact_match():
+    df = pd.DataFrame(columns=["patient id", "name", "id"], data=[["P1", "John", "1"]])
+
+    table = get_columns_fuzzy(df, columns=["id", "name"])
+    assert table.columns.to_list() == ["id", "name"]
+    assert table["id"].to_list() == ["1"]
+
+    # the result is independent of the input, so it can be edited without warnings
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        table["name"] = table["name"].str.upper()
+
+    assert df["name"].to_list() == ["John"]
+
+
 def _create_fake_dataframes(headers: Sequence[Sequence[str]]) -> Sequence[pd.DataFrame]:
     return [pd.DataFrame(columns=h) for h in headers]
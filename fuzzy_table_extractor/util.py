@@ -1,11 +1,19 @@
 import functools
 from collections.abc import Sequence
-from typing import Protocol
+from typing import Any, Optional, Protocol
 
+import numpy as np
 import pandas as pd
-from fuzzywuzzy import fuzz
+from rapidfuzz import fuzz, process
 from unidecode import unidecode
 
+# Caches are bounded, so long running processes handling many documents do not keep
+# every text ever compared in memory.
+_CACHE_SIZE = 100_000
+
+# characters ignored when comparing texts
+_REMOVED_CHARS = str.maketrans("", "", " \n")
+
 
 class _Cell(Protocol):
     text: str
@@ -31,11 +39,28 @@ def table_to_dataframe(table: _Table) -> pd.DataFrame:
     Returns:
         pd.DataFrame: Dataframe holding the data in the table.
     """
-    headers = [cell.text for cell in table.rows[0].cells]
-    if len(table.rows) == 1:
+    return records_to_dataframe(
+        [[cell.text for cell in row.cells] for row in table.rows]
+    )
+
+
+def records_to_dataframe(records: Sequence[Sequence[str]]) -> pd.DataFrame:
+    """Converts the cell texts of a table to a pandas Dataframe.
+
+    The first record holds the headers of the table and the others hold the data. Headers
+    are trimmed, or filled with `unnamed col` names, to match the size of the data.
+
+    Args:
+        records (Sequence[Sequence[str]]): Text of the cells in each row of the table.
+
+    Returns:
+        pd.DataFrame: Dataframe holding the data in the table.
+    """
+    headers = list(records[0])
+    if len(records) == 1:
         return pd.DataFrame(columns=headers)
 
-    data = [[cell.text for cell in row.cells] for row in table.rows[1:]]
+    data = records[1:]
     max_size = max(len(row) for row in data)
 
     if len(headers) > max_size:
@@ -49,7 +74,7 @@ def table_to_dataframe(table: _Table) -> pd.DataFrame:
     return df
 
 
-@functools.cache
+@functools.lru_cache(maxsize=_CACHE_SIZE)
 def str_comparison(text_a: str, text_b: str) -> int:
     """Get the proximity ratio of 2 strings
 
@@ -64,10 +89,46 @@ def str_comparison(text_a: str, text_b: str) -> int:
     if not isinstance(text_a, str) or not isinstance(text_b, str):
         return 0
 
-    a = text_a.replace(" ", "").replace("\n", "")
-    b = text_b.replace(" ", "").replace("\n", "")
+    # scored by the matrix, so both round ratios such as 62.5 the same way
+    return int(str_comparison_matrix([text_a], [text_b])[0, 0])
+
+
+def str_comparison_matrix(texts_a: Sequence[Any], texts_b: Sequence[Any]) -> np.ndarray:
+    """Get the proximity ratio of every pair of strings in 2 sequences.
+
+    The whole matrix is computed in a single call, which is much faster than calling
+    `str_comparison` for each pair.
+
+    Args:
+        texts_a (Sequence[Any]): input texts A
+        texts_b (Sequence[Any]): input texts B
+
+    Returns:
+        np.ndarray: matrix of shape (len(texts_a), len(texts_b)) where the element
+            [i, j] is the ratio of proximity for texts_a[i] and texts_b[j] [0 - 100]
+    """
+    return process.cdist(
+        [_normalize(t) for t in texts_a],
+        [_normalize(t) for t in texts_b],
+        scorer=fuzz.partial_ratio,
+        dtype=np.uint8,
+    )
+
+
+@functools.lru_cache(maxsize=_CACHE_SIZE)
+def _normalize(text: Any) -> Optional[str]:
+    """Removes spaces, line breaks, casing and accents from a text.
+
+    Search terms are compared against every table in a document, so the result is
+    cached to normalize each distinct text only once.
+    """
+    if not isinstance(text, str):
+        return None
+
+    text = text.translate(_REMOVED_CHARS).lower()
 
-    a = unidecode(a.lower())
-    b = unidecode(b.lower())
+    # unidecode keeps ASCII texts unchanged, so it is only needed for the others
+    if text.isascii():
+        return text
 
-    return fuzz.partial_ratio(a, b)
+    return unidecode(text)
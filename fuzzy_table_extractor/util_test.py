@@ -1,4 +1,4 @@
-from .util import table_to_dataframe
+from .util import str_comparison, str_comparison_matrix, table_to_dataframe
 from collections.abc import Sequence, MutableSequence
 from dataclasses import dataclass
 
@@ -77,3 +77,17 @@ def test_table_less_columns_to_dataframe():
 
     diff = expected_df.compare(df)
     assert diff.empty
+
+
+def test_str_comparison_matrix():
+    # "cebbedecd" and "caceadec" have a partial ratio of exactly 62.5
+    texts_a = ["Name", "idade", None, "cebbedecd"]
+    texts_b = ["name", "Idade ", "ID", 0, "caceadec"]
+
+    matrix = str_comparison_matrix(texts_a, texts_b)
+
+    assert matrix.shape == (4, 5)
+    assert matrix[3, 4] == 63
+    for i, a in enumerate(texts_a):
+        for j, b in enumerate(texts_b):
+            assert matrix[i, j] == str_comparison(a, b)